@@ -8,6 +8,8 @@ class RabiExperiment(Experiment):
     
     def __init__(self):
         super().__init__('config/quantum_config.yaml')
+        # O qubit não muda entre os pontos do sweep: busca uma única vez
+        self._qubit = self.system.get_instances(TunableQubit)[0]
 
     def make_sequence(
         self,
@@ -17,7 +19,7 @@ class RabiExperiment(Experiment):
         
         #Gera a sequência de pulsos para um único ponto de um sweep de Rabi.
         
-        qubit = self.system.get_instances(TunableQubit)[0] 
+        qubit = self._qubit
 
         # Adiciona o pulso de controle (Rabi) à sequência.
         the_sequencer.append(qubit.xy.play_pulse(amplitude=amplitude)) # [cite: 4681]
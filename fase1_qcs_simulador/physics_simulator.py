@@ -1,5 +1,68 @@
+import logging
 import qutip as qt
 import numpy as np
+from scipy.interpolate import make_interp_spline
+
+logger = logging.getLogger(__name__)
+
+# Conversão da amplitude do pulso (V) para frequência de Rabi (Hz)
+VOLT_TO_RABI_HERTZ = 25e6
+# Mesma conversão já em frequência angular (rad/s por V)
+VOLT_TO_ANGULAR_RABI = 2.0 * np.pi * VOLT_TO_RABI_HERTZ
+
+# Operadores fixos do modelo (rotating frame, H0 = 0), criados uma única vez.
+# Operadores 2x2 em armazenamento denso: CSR só adiciona indireção em matrizes tão pequenas
+H_DRIVE = (0.5 * qt.sigmax()).to('Dense') # Um drive no eixo X
+PSI0 = qt.basis(2, 0).to('Dense') # Qubit começa no estado |0> (estado fundamental)
+PROJECTION_OPERATOR_1 = qt.ket2dm(qt.basis(2, 1)).to('Dense') # População no estado |1> (excitado)
+
+def build_drive_hamiltonian(
+    unit_pulse_envelope: np.ndarray,
+    t_list: np.ndarray
+) -> qt.QobjEvo:
+
+    #Monta o Hamiltoniano reutilizável do drive com amplitude unitária, H(t) = Omega(t)/2 * X.
+
+    #Args:
+    #    unit_pulse_envelope (np.ndarray): O envelope do pulso com amplitude unitária (V).
+    #    t_list (np.ndarray): O array de tempo correspondente ao pulso.
+
+    #Returns:
+    #    qt.QobjEvo: Hamiltoniano a ser escalado pela amplitude de cada ponto (ver run_drive).
+
+    if len(t_list) != len(unit_pulse_envelope):
+        raise ValueError("t_list e envelope precisam ter o mesmo tamanho")
+
+    logger.debug("pulse shape=%s tlist=%s", unit_pulse_envelope.shape, t_list.shape)
+
+    # Amplitude do envelope precisa ser convertida para frequencia angular
+    unit_angular_envelope = unit_pulse_envelope * VOLT_TO_ANGULAR_RABI
+
+    # O envelope amostrado entra direto como coeficiente em array: o QuTiP monta
+    # uma spline cúbica compilada, sem chamar Python a cada passo do ODE.
+    envelope_coeff = qt.coefficient(unit_angular_envelope, tlist=t_list)
+    return qt.QobjEvo([[H_DRIVE, envelope_coeff]])
+
+def run_drive(unit_hamiltonian: qt.QobjEvo, t_list: np.ndarray, amplitude: float) -> float:
+
+    #Evolui |0> sob amplitude * unit_hamiltonian (de build_drive_hamiltonian) e retorna P(|1>) final.
+
+    # A amplitude é um fator constante: escalar o QobjEvo só multiplica o termo, sem
+    # novo coeficiente. Um coeficiente em string ("amp" nos args) exigiria Cython e um
+    # compilador C; sem eles o QuTiP cai em eval() a cada passo do integrador. Montar
+    # o SESolver por ponto é barato frente ao ODE e não depende de nada disso.
+    solver = qt.SESolver(amplitude * unit_hamiltonian)
+
+    # Solução de Schrödinger
+    # Só o valor final interessa: pede apenas os instantes inicial e final. O passo
+    # interno continua adaptativo e o envelope já está no coeficiente (H).
+    result = solver.run(
+        PSI0, [t_list[0], t_list[-1]],
+        e_ops=[PROJECTION_OPERATOR_1]
+    )
+
+    # A probabilidade de estar no estado |1> é o valor de expectação final do nosso operador.
+    return result.expect[0][-1]
 
 def simulate_qubit_evolution(
     pulse_envelope: np.ndarray, 
@@ -17,55 +80,39 @@ def simulate_qubit_evolution(
     #Returns:
     #    float: A probabilidade final de encontrar o qubit no estado |1>.
 
-    # Parâmetros
-    VOLT_TO_RABI_HERTZ = 25e6
-    qubit_freq_from_params = qubit_params.get('frequency', 5.0e9) # Pega do YAML, com um padrão
-    
-    if isinstance(qubit_freq_from_params, (list, tuple)):
-        qubit_freq = float(qubit_freq_from_params[0])
-    else:
-        qubit_freq = float(qubit_freq_from_params)
-
     # Hamiltoniano: H = w0/2 * Z + Omega * cos(w_drive * t) * X
+    # Na rotating frame, ressonante, só resta o drive (ver build_drive_hamiltonian),
+    # então a frequência do qubit em qubit_params não entra no modelo.
 
-    # Definir o hamiltoniano na rotating frame
+    # Execução avulsa: o envelope já traz a amplitude, então amp = 1
+    return run_drive(build_drive_hamiltonian(pulse_envelope, t_list), t_list, 1.0)
 
-    # H_drive: O operador de controle (como o pulso afeta o qubit)
-    H_drive = 0.5 * qt.sigmax() # Um drive no eixo X
+def rabi_angle(pulse_envelope: np.ndarray, t_list: np.ndarray) -> float:
 
-    
-    # Amplitude do envelope precisa ser convertida para frequencia angular
-    rabi_freq_envelope = pulse_envelope * VOLT_TO_RABI_HERTZ
-    angular_freq_envelope = 2 * np.pi * rabi_freq_envelope
+    #Calcula o ângulo de rotação de Rabi acumulado pelo pulso.
 
-    if len(t_list) != len(angular_freq_envelope):
-        raise ValueError("t_list e envelope precisam ter o mesmo tamanho")
+    #Args:
+    #    pulse_envelope (np.ndarray): O envelope de amplitude do pulso de controle.
+    #    t_list (np.ndarray): O array de tempo correspondente ao pulso.
 
-    # Montar o vetor [ [t0, a0], [t1, a1], ..., [tn, an] ]
-    time_array = np.column_stack((t_list, angular_freq_envelope))
+    #Returns:
+    #    float: theta = 2*pi*VOLT_TO_RABI_HERTZ * integral(envelope dt), em radianos.
 
-    # Parte tempo-dependente
-    # H0 = 0
-    def envelope_func(t, args=None):
-        return np.interp(t, t_list, angular_freq_envelope)
+    if len(t_list) != len(pulse_envelope):
+        raise ValueError("t_list e envelope precisam ter o mesmo tamanho")
 
-    H = [[H_drive, envelope_func]]
+    # Integra a mesma spline cúbica (not-a-knot) que o coeficiente em array do QuTiP
+    # monta para o solver, no mesmo intervalo [t0, tn]: assim analytic=True e o ODE
+    # concordam dentro da tolerância do integrador.
+    spline = make_interp_spline(t_list, pulse_envelope, k=min(3, len(t_list) - 1))
+    area = spline.integrate(t_list[0], t_list[-1])
+    return VOLT_TO_ANGULAR_RABI * area
 
-    psi0 = qt.basis(2, 0)  # Qubit começa no estado |0> (estado fundamental)
-    
-    # Operador para medir a população no estado |1> (excitado)
-    projection_operator_1 = qt.ket2dm(qt.basis(2, 1))
 
-    print("Pulso shape:", pulse_envelope.shape)
-    print("t_list shape:", t_list.shape)
-    print("Hamil. dependente do tempo shape:", time_array.shape)
-    print("Primeiros 5 valores do pulso:", angular_freq_envelope[:5])
+def excited_state_probability(theta: float) -> float:
 
-    # Solução de Schrödinger
-    result = qt.mesolve(H, psi0, t_list, c_ops=[], e_ops=[projection_operator_1])
+    #Probabilidade de |1> após uma rotação de ângulo theta em torno de X, partindo de |0>.
 
-    # Extrair o resultado final
-    # A probabilidade de estar no estado |1> é o valor de expectação final do nosso operador.
-    final_prob_1 = result.expect[0][-1]
-    
-    return final_prob_1
\ No newline at end of file
+    # H(t) = Omega(t)/2 * X comuta consigo mesmo em todos os instantes, então o
+    # propagador é exatamente U = exp(-i*theta/2 * X) e |<1|U|0>|^2 = sin^2(theta/2).
+    return np.sin(theta / 2) ** 2
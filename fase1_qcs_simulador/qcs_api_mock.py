@@ -11,11 +11,16 @@ Funcionalidades implementadas:
 - Classes base para Experimentos, Dispositivos Quânticos e Canais.
 - Um SequenceBuilder para a criação de sequências de pulsos.
 - Backends funcionais para impressão (console) e plotagem (Matplotlib).
+
+O PlottingBackend não abre janela sozinho: execute() só atualiza a figura. Chame
+show() ao final para exibi-la (bloqueante); show() e close() liberam a figura.
 """
 
+import functools
 import yaml
 import numpy as np
 import matplotlib.pyplot as plt
+from collections import defaultdict
 from dataclasses import dataclass
 
 # --- Classes de Operação (Estruturas de Dados) ---
@@ -39,6 +44,36 @@ class MeasureOperation:
     channel_path: str
     integration_time: float
 
+def _uniform_time_grid(duration, n_intervals):
+    # Grade uniforme no intervalo fechado [0, duration]: n_intervals + 1 pontos, passo
+    # dt = duration / n_intervals. Regra única de amostragem para todas as formas de onda.
+    return np.arange(n_intervals + 1) * (duration / n_intervals)
+
+def _intervals_for_rate(duration, sample_rate):
+    # Número de intervalos da grade para uma taxa de amostragem (ao menos 1, ou seja, 2 pontos)
+    return max(round(duration * sample_rate), 1)
+
+def _gaussian_envelope(t, duration, out):
+    # Envelope gaussiano unitário exp(-0.5 * ((t - duration/2) / sigma)**2), sigma = duration/4,
+    # calculado in-place em 'out' (float32), sem arrays temporários. Retorna 'out'.
+    sigma = duration / 4
+    np.subtract(t, duration / 2, out=out)
+    np.multiply(out, 1.0 / sigma, out=out)
+    np.square(out, out=out)
+    np.multiply(out, -0.5, out=out)
+    return np.exp(out, out=out)
+
+def channel_kind(channel_path):
+    # Classificador único dos canais de pulso: 'xy', 'z', 'drive' ou None.
+    # Usado pelo SequenceBuilder e pelos backends, para que todos concordem.
+    if 'xy' in channel_path:
+        return 'xy'
+    if 'z' in channel_path:
+        return 'z'
+    if 'drive' in channel_path:
+        return 'drive'
+    return None
+
 # --- Classes de Canal ---
 # Representam os canais de controle físicos (emulados). Seus métodos
 # criam e retornam os objetos de Operação.
@@ -102,6 +137,8 @@ class System:
             self.config = yaml.safe_load(f)
         
         self.quantum_devices = {}
+        # Índice por tipo (e classes base) de dispositivo, montado no carregamento para consultas O(1)
+        self._by_type: dict[type, list] = defaultdict(list)
         self._load_devices()
 
     def _load_devices(self):
@@ -109,32 +146,61 @@ class System:
             'TunableQubit': TunableQubit,
             'ReadoutResonator': ReadoutResonator
         }
+        # Qubits cujo readout será linkado quando todos os ressoadores existirem
+        pending_links = []
+
         for name, config in self.config.get('quantum_devices', {}).items():
             device_class = device_map.get(config['type'])
             if device_class:
-                self.quantum_devices[name] = device_class(name, config)
+                device = device_class(name, config)
+                self.quantum_devices[name] = device
+                # Registra em toda a hierarquia, preservando a semântica de isinstance
+                for device_type in type(device).__mro__:
+                    self._by_type[device_type].append(device)
+
+                if isinstance(device, TunableQubit):
+                    pending_links.append((device, config['channels']['readout']))
 
         # Linkar readout dos qubits aos ressoadores
-        for device in self.quantum_devices.values():
-            if isinstance(device, TunableQubit):
-                readout_name = self.config['quantum_devices'][device.name]['channels']['readout']
-                if readout_name in self.quantum_devices:
-                    resonator = self.quantum_devices[readout_name]
-                    device.readout = resonator.measure_channel
+        for device, readout_name in pending_links:
+            if readout_name in self.quantum_devices:
+                resonator = self.quantum_devices[readout_name]
+                device.readout = resonator.measure_channel
 
     def get_instances(self, device_type):
-        return [dev for dev in self.quantum_devices.values() if isinstance(dev, device_type)]
+        # Cópia para que quem chama não altere o índice interno
+        return list(self._by_type.get(device_type, ()))
 
 class SequenceBuilder:
     # Coleta operações em uma lista para serem executadas por um backend.
+    # Além da lista ordenada, classifica as operações por tipo/canal já na montagem,
+    # para que os backends acessem diretamente o que precisam.
+    # append() (ou delay()) é a única forma suportada de adicionar operações: escrever
+    # direto em operations deixaria as listas por tipo desatualizadas.
     def __init__(self):
         self.operations = []
+        self.pulses_xy: list[PulseOperation] = []
+        self.pulses_z: list[PulseOperation] = []
+        self.pulses_drive: list[PulseOperation] = []
+        self.measures: list[MeasureOperation] = []
+        self.delays: list[DelayOperation] = []
+        # channel_kind -> lista de pulsos correspondente
+        self._pulse_lists = {'xy': self.pulses_xy, 'z': self.pulses_z, 'drive': self.pulses_drive}
 
     def append(self, operation):
         self.operations.append(operation)
 
+        if isinstance(operation, PulseOperation):
+            pulse_list = self._pulse_lists.get(channel_kind(operation.channel_path))
+            if pulse_list is not None:
+                pulse_list.append(operation)
+        elif isinstance(operation, MeasureOperation):
+            self.measures.append(operation)
+        elif isinstance(operation, DelayOperation):
+            self.delays.append(operation)
+
     def delay(self, duration):
-        self.operations.append(DelayOperation(duration=duration))
+        self.append(DelayOperation(duration=duration))
 
 class Experiment:
     # Classe base para todos os experimentos. Carrega o sistema e executa sequências.
@@ -149,8 +215,12 @@ class Experiment:
         builder = SequenceBuilder()
         # Chama a implementação do usuário para construir a sequência
         self.make_sequence(builder, **kwargs)
-        # Passa a sequência construída para o backend executar
-        return backend.execute(builder.operations)
+        # Passa a sequência construída para o backend executar. Backends que só
+        # implementam execute(operations) continuam recebendo a lista ordenada.
+        execute_sequence = getattr(backend, 'execute_sequence', None)
+        if execute_sequence is None:
+            return backend.execute(builder.operations)
+        return execute_sequence(builder)
 
 # --- Backends ---
 
@@ -158,6 +228,10 @@ class BaseBackend:
     def execute(self, operations):
         raise NotImplementedError
 
+    def execute_sequence(self, builder: SequenceBuilder):
+        # Por padrão executa a lista ordenada; backends podem usar as listas por tipo do builder.
+        return self.execute(builder.operations)
+
 class PrintingBackend(BaseBackend):
     # Um backend que imprime a sequência de operações no console.
     def execute(self, operations):
@@ -168,68 +242,153 @@ class PrintingBackend(BaseBackend):
 
 class PlottingBackend(BaseBackend):
     # Um backend que usa Matplotlib para visualizar as formas de onda da sequência.
+    # A figura é criada no primeiro execute e reaproveitada nos seguintes: cada execute
+    # só atualiza os dados das linhas (Line2D.set_data) e pede um redesenho (draw_idle),
+    # sem abrir janela. Para exibi-la é obrigatório chamar show() uma vez ao final
+    # (bloqueante, como plt.show()). show() fecha a figura ao retornar; sem show(),
+    # chame close() para que figuras de backends descartados não se acumulem no pyplot.
+
+    def __init__(self):
+        self.fig = None
+        self.axs = None
+
+        # (channel_path, ocorrência na sequência) -> Line2D
+        self._lines = {}
+        self._occurrences = defaultdict(int)
+
+    def _ensure_figure(self):
+        if self.fig is not None:
+            return
+        self.fig, self.axs = plt.subplots(3, 1, sharex=True, figsize=(10, 6))
+        self.fig.suptitle("Visualização da Sequência de Pulsos (Mock)")
+        self.axs[0].set_ylabel("Controle XY (V)")
+        self.axs[1].set_ylabel("Controle Z (V)")
+        self.axs[2].set_ylabel("Leitura (V)")
+        self.axs[2].set_xlabel("Tempo (s)")
+        for ax in self.axs:
+            ax.grid(True)
+        self.fig.tight_layout(rect=[0, 0, 1, 0.96])
+
+    def _update_line(self, ax, time_axis, envelope, label, **style):
+        # Reaproveita a linha desta ocorrência do canal se já existir; senão cria.
+        occurrence = self._occurrences[label]
+        self._occurrences[label] += 1
+        key = (label, occurrence)
+
+        line = self._lines.get(key)
+        if line is None:
+            line, = ax.plot(time_axis, envelope, label=label, **style)
+            self._lines[key] = line
+        else:
+            line.set_data(time_axis, envelope)
+
+    def show(self):
+        # Exibe a figura e bloqueia até a janela ser fechada; depois a libera.
+        if self.fig is not None:
+            plt.show()
+            self.close()
+
+    def close(self):
+        # Fecha a figura (remove do pyplot) e limpa o estado; o próximo execute cria outra.
+        if self.fig is not None:
+            plt.close(self.fig)
+        self.fig = None
+        self.axs = None
+        self._lines.clear()
     
     def _generate_waveform(self, op: PulseOperation, sample_rate=1e9):
         # Helper para criar a forma de onda numérica a partir da operação de pulso.
-        n_points = int(op.duration * sample_rate)
-        t = np.linspace(0, op.duration, n_points)
+        # Mesma regra do utils.converter: intervalo fechado [0, duration]
+        t = _uniform_time_grid(op.duration, _intervals_for_rate(op.duration, sample_rate))
+        n_points = len(t)
         
         if op.shape == 'gaussian':
-            sigma = op.duration / 4
-            envelope = op.amplitude * np.exp(-0.5 * ((t - op.duration / 2) / sigma)**2)
+            envelope = _gaussian_envelope(t, op.duration, np.empty(n_points, dtype=np.float32))
+            np.multiply(envelope, op.amplitude, out=envelope)
         elif op.shape == 'square':
-            envelope = op.amplitude * np.ones(n_points)
+            envelope = np.full(n_points, op.amplitude, dtype=np.float32)
         else:
-            envelope = np.zeros(n_points)
+            envelope = np.zeros(n_points, dtype=np.float32)
             
         return t, envelope
 
+    # Handlers por tipo de operação: desenham a operação e retornam o novo tempo corrente.
+    # 'plotters' mapeia channel_kind ('xy', 'z', 'drive') para a função que desenha no eixo certo.
+
+    def _plot_pulse(self, op, current_time, plotters):
+        plot = plotters.get(channel_kind(op.channel_path))
+        if plot is not None:
+            t, envelope = self._generate_waveform(op)
+            plot(t + current_time, envelope, label=op.channel_path)
+
+        return current_time + op.duration
+
+    def _plot_delay(self, op, current_time, plotters):
+        return current_time + op.duration
+
+    def _plot_measure(self, op, current_time, plotters):
+        # Emula um pulso de leitura simples
+        readout_op = PulseOperation(
+            channel_path=op.channel_path,
+            duration=op.integration_time,
+            amplitude=0.2, # Amplitude fixa para visualização
+            shape='square'
+        )
+        t, envelope = self._generate_waveform(readout_op)
+        time_axis = t + current_time
+        plotters['drive'](time_axis, envelope, label=op.channel_path, linestyle='--', color='gray')
+        return current_time + op.integration_time
+
+    _type_dispatch = {
+        PulseOperation: _plot_pulse,
+        DelayOperation: _plot_delay,
+        MeasureOperation: _plot_measure,
+    }
+
+    @classmethod
+    def _find_handler(cls, op_type):
+        # Percorre a hierarquia (MRO) para que subclasses das operações usem o handler da base
+        for base in op_type.__mro__:
+            handler = cls._type_dispatch.get(base)
+            if handler is not None:
+                return handler
+        return None
+
     def execute(self, operations):
         print("\n--- [PlottingBackend] Gerando gráfico da sequência ---")
         
-        fig, axs = plt.subplots(3, 1, sharex=True, figsize=(10, 6))
-        fig.suptitle("Visualização da Sequência de Pulsos (Mock)")
-        axs[0].set_ylabel("Controle XY (V)")
-        axs[1].set_ylabel("Controle Z (V)")
-        axs[2].set_ylabel("Leitura (V)")
-        axs[2].set_xlabel("Tempo (s)")
+        self._ensure_figure()
+        self._occurrences.clear()
+
+        # Referências locais para evitar buscas de atributo dentro do loop
+        axs = self.axs
+        plotters = {
+            'xy': functools.partial(self._update_line, axs[0]),
+            'z': functools.partial(self._update_line, axs[1]),
+            'drive': functools.partial(self._update_line, axs[2]),
+        }
+        find_handler = self._find_handler
 
         current_time = 0.0
         
         for op in operations:
-            if isinstance(op, PulseOperation):
-                t, envelope = self._generate_waveform(op)
-                time_axis = t + current_time
-                
-                if 'xy' in op.channel_path:
-                    axs[0].plot(time_axis, envelope, label=op.channel_path)
-                elif 'z' in op.channel_path:
-                    axs[1].plot(time_axis, envelope, label=op.channel_path)
-                elif 'drive' in op.channel_path:
-                    axs[2].plot(time_axis, envelope, label=op.channel_path)
-                
-                current_time += op.duration
-
-            elif isinstance(op, DelayOperation):
-                current_time += op.duration
-            
-            elif isinstance(op, MeasureOperation):
-                # Emula um pulso de leitura simples
-                readout_op = PulseOperation(
-                    channel_path=op.channel_path,
-                    duration=op.integration_time,
-                    amplitude=0.2, # Amplitude fixa para visualização
-                    shape='square'
-                )
-                t, envelope = self._generate_waveform(readout_op)
-                time_axis = t + current_time
-                axs[2].plot(time_axis, envelope, label=op.channel_path, linestyle='--', color='gray')
-                current_time += op.integration_time
+            handler = find_handler(type(op))
+            if handler is not None:
+                current_time = handler(self, op, current_time, plotters)
 
+        # Remove as linhas que esta sequência não usou (ex: pulsos a menos que na anterior)
+        for key in list(self._lines):
+            label, occurrence = key
+            if occurrence >= self._occurrences[label]:
+                self._lines.pop(key).remove()
+
+        # Legenda refeita a cada execução, só com as linhas atuais
         for ax in axs:
-            if ax.has_data():
+            ax.relim()
+            ax.autoscale_view()
+            if ax.lines:
                 ax.legend(fontsize='small')
-            ax.grid(True)
-        
-        plt.tight_layout(rect=[0, 0, 1, 0.96])
-        plt.show()
\ No newline at end of file
+            elif ax.get_legend() is not None:
+                ax.get_legend().remove()
+
+        self.fig.canvas.draw_idle()
\ No newline at end of file
@@ -14,6 +14,9 @@ amplitudes = np.linspace(0, 1.0, 3) # Vamos usar 3 pontos para um teste rápido
 
 print("--- Iniciando Simulação de Sequência de Rabi com API Mock ---")
 
+# Um único PlottingBackend reaproveita a mesma figura em todos os pontos.
+plotter = PlottingBackend()
+
 # 3. Itera sobre os parâmetros e executa o experimento para cada um.
 for i, amp in enumerate(amplitudes):
     print(f"\n--- Ponto {i+1}/{len(amplitudes)}: Amplitude = {amp:.2f} ---")
@@ -22,56 +25,129 @@ for i, amp in enumerate(amplitudes):
     exp.run(backend=PrintingBackend(), amplitude=amp)
     
     # Executa com o PlottingBackend para visualizar a forma de onda.
-    exp.run(backend=PlottingBackend(), amplitude=amp)
+    exp.run(backend=plotter, amplitude=amp)
 
 print("\n--- Simulação de Sequência Concluída ---")
+
+# Exibe a figura (bloqueante) com a sequência do último ponto.
+plotter.show()
 """
+import argparse
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
 
 # Classes do projeto
 from experiments.rabi import RabiExperiment
-from qcs_api_mock import BaseBackend, PulseOperation, TunableQubit
+from qcs_api_mock import BaseBackend, PulseOperation, SequenceBuilder, channel_kind
 from utils.converter import pulse_to_waveform
-from physics_simulator import simulate_qubit_evolution
+from physics_simulator import build_drive_hamiltonian, run_drive, rabi_angle, excited_state_probability
 
 class QuTiPSimulationBackend(BaseBackend):
 
     # Um backend customizado que executa a simulação física com QuTiP.
     # Ele conecta a sequência de pulsos gerada pela QCS com o simulador.
+    # O Hamiltoniano é montado uma vez por forma de pulso e reutilizado em todo o sweep:
+    # como o drive é linear na amplitude, cada ponto só o escala pela sua amplitude.
+    # Com analytic=True (padrão) nem o ODE é resolvido: o ângulo de Rabi do pulso
+    # unitário é calculado uma vez e escalado pela amplitude de cada ponto.
 
-    def __init__(self, experiment_instance):
+    def __init__(self, experiment_instance, analytic=True):
         self.experiment = experiment_instance
+        self.analytic = analytic
+
+        # (duration, shape) -> (t_list, Hamiltoniano com amplitude 1)
+        self._hamiltonians = {}
+        # (duration, shape) -> ângulo de Rabi do pulso com amplitude 1
+        self._unit_angles = {}
+
+    def _unit_waveform(self, op: PulseOperation):
+        # Envelope do mesmo pulso com amplitude unitária
+        return pulse_to_waveform(dataclasses.replace(op, amplitude=1.0))
+
+    def _get_unit_angle(self, op: PulseOperation):
+        key = (op.duration, op.shape)
+        if key not in self._unit_angles:
+            t_list, unit_envelope = self._unit_waveform(op)
+            self._unit_angles[key] = rabi_angle(unit_envelope, t_list)
+        return self._unit_angles[key]
+
+    def _get_hamiltonian(self, op: PulseOperation):
+        key = (op.duration, op.shape)
+        if key not in self._hamiltonians:
+            t_list, unit_envelope = self._unit_waveform(op)
+            self._hamiltonians[key] = (t_list, build_drive_hamiltonian(unit_envelope, t_list))
+        return self._hamiltonians[key]
+
+    def _simulate_pulse(self, control_pulse_op: PulseOperation):
+        if self.analytic:
+            theta = control_pulse_op.amplitude * self._get_unit_angle(control_pulse_op)
+            return excited_state_probability(theta)
+
+        t_list, unit_hamiltonian = self._get_hamiltonian(control_pulse_op)
+
+        # Reaproveita o Hamiltoniano; só a amplitude é nova
+        return run_drive(unit_hamiltonian, t_list, control_pulse_op.amplitude)
 
     def execute(self, operations):
-        control_pulse_op = next((op for op in operations if isinstance(op, PulseOperation) and 'xy' in op.channel_path), None)
-        
-        if control_pulse_op is None:
-            return 0.0 
-
-        # Conversor
-        t_list, envelope = pulse_to_waveform(control_pulse_op)
-        
-        # Parametros
-        qubit = self.experiment.system.get_instances(TunableQubit)[0]
-        qubit_params = qubit.parameters
-
-        final_prob = simulate_qubit_evolution(envelope, t_list, qubit_params)
-        
-        return final_prob
+        # Lista avulsa, sem builder: procura o primeiro pulso XY com o mesmo
+        # classificador do SequenceBuilder, parando assim que o encontra.
+        for op in operations:
+            if isinstance(op, PulseOperation) and channel_kind(op.channel_path) == 'xy':
+                return self._simulate_pulse(op)
+        return 0.0
+
+    def execute_sequence(self, builder: SequenceBuilder):
+        # O builder já separou os pulsos XY: sem varrer a lista de operações
+        if not builder.pulses_xy:
+            return 0.0
+
+        return self._simulate_pulse(builder.pulses_xy[0])
+
+def run_one(amp, exp, backend):
+    # Executa um único ponto do sweep e retorna P(|1>).
+    return exp.run(backend=backend, amplitude=amp)
+
+# Estado de cada processo do pool: um experimento e um backend (com seus Hamiltonianos)
+# montados uma vez pelo initializer, em vez de serializados a cada tarefa.
+_worker_exp = None
+_worker_backend = None
+
+def _init_worker():
+    global _worker_exp, _worker_backend
+    _worker_exp = RabiExperiment()
+    _worker_backend = QuTiPSimulationBackend(_worker_exp, analytic=False)
+
+def _run_worker(amp):
+    return run_one(amp, _worker_exp, _worker_backend)
 
 if __name__ == "__main__":
-    exp = RabiExperiment()
-    sim_backend = QuTiPSimulationBackend(exp)
+    parser = argparse.ArgumentParser(description="Simulação de Rabi com QuTiP")
+    parser.add_argument(
+        "--ode", action="store_true",
+        help="Resolve a equação de Schrödinger em cada ponto (em paralelo) em vez da forma fechada"
+    )
+    cli_args = parser.parse_args()
 
     amplitudes = np.linspace(0, 1.5, 101) 
-    results = []
 
     print("--- Iniciando Simulação de Rabi com Integração QuTiP ---")
 
-    for i, amp in enumerate(amplitudes):
-        prob_1 = exp.run(backend=sim_backend, amplitude=amp)
-        results.append(prob_1)
+    if cli_args.ode:
+        # No caminho ODE os pontos são integrações independentes: distribui entre os núcleos.
+        # Cada processo monta o próprio backend uma vez e reaproveita o Hamiltoniano em todos os
+        # seus pontos; chunksize agrupa as tarefas para diluir o custo de IPC.
+        with ProcessPoolExecutor(initializer=_init_worker) as pool:
+            results = list(pool.map(_run_worker, amplitudes, chunksize=8))
+    else:
+        # Cada ponto é um sin^2 fechado: o loop serial leva ~1 ms e um pool
+        # de processos só adicionaria custo de inicialização e pickling.
+        exp = RabiExperiment()
+        sim_backend = QuTiPSimulationBackend(exp)
+        results = [run_one(amp, exp, sim_backend) for amp in amplitudes]
+
+    for i, (amp, prob_1) in enumerate(zip(amplitudes, results)):
         print(f"Ponto {i+1}/{len(amplitudes)}: Amp={amp:.3f} -> P(|1>)={prob_1:.4f}")
 
     print("--- Simulação Concluída ---")
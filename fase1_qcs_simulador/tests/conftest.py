@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos do simulador são importados pelo nome (ex: 'qcs_api_mock'), a partir
+# da pasta fase1_qcs_simulador.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import math
+
+import numpy as np
+import pytest
+
+from qcs_api_mock import PulseOperation
+from utils.converter import pulse_to_waveform
+from physics_simulator import (
+    VOLT_TO_ANGULAR_RABI,
+    build_drive_hamiltonian,
+    run_drive,
+    rabi_angle,
+    excited_state_probability,
+)
+
+
+def _unit_xy_waveform():
+    return pulse_to_waveform(PulseOperation(channel_path='q0.xy', amplitude=1.0))
+
+
+@pytest.mark.parametrize("amplitude", [0.0, 0.3, 0.75, 1.0, 1.5])
+def test_analytic_matches_ode(amplitude):
+    # O caminho analítico (analytic=True) deve concordar com o ODE do QuTiP.
+    t_list, unit_envelope = _unit_xy_waveform()
+    unit_hamiltonian = build_drive_hamiltonian(unit_envelope, t_list)
+
+    ode_prob = run_drive(unit_hamiltonian, t_list, amplitude)
+    analytic_prob = excited_state_probability(amplitude * rabi_angle(unit_envelope, t_list))
+
+    assert ode_prob == pytest.approx(analytic_prob, abs=1e-4)
+
+
+def test_unit_angle_matches_gaussian_area():
+    # Com a grade padrão, o ângulo do pulso unitário deve bater com a área exata
+    # da gaussiana truncada em [0, T]: sigma*sqrt(2*pi)*erf(T / (2*sqrt(2)*sigma)).
+    t_list, unit_envelope = _unit_xy_waveform()
+    duration = PulseOperation(channel_path='q0.xy').duration
+    sigma = duration / 4
+
+    exact_area = sigma * np.sqrt(2 * np.pi) * math.erf(duration / (2 * np.sqrt(2) * sigma))
+
+    assert t_list[-1] == pytest.approx(duration)
+    assert unit_envelope[0] == pytest.approx(unit_envelope[-1])
+    assert rabi_angle(unit_envelope, t_list) == pytest.approx(VOLT_TO_ANGULAR_RABI * exact_area, rel=1e-4)
@@ -1,27 +1,56 @@
+import functools
+from typing import Optional
 import numpy as np
-from qcs_api_mock import PulseOperation
+from qcs_api_mock import PulseOperation, _gaussian_envelope, _intervals_for_rate, _uniform_time_grid
 
-def pulse_to_waveform(op: PulseOperation, sample_rate: float = 1e9) -> tuple[np.ndarray, np.ndarray]:
+# Grade padrão, suficiente para resolver o envelope na rotating frame: 8 intervalos
+# por sigma com sigma = duration / 4, ou seja, sempre 32 intervalos, qualquer que seja a duração.
+_DEFAULT_INTERVALS = 32
+
+@functools.lru_cache(maxsize=32)
+def _normalized_envelope(duration: float, shape: str, sample_rate: Optional[float]) -> tuple[np.ndarray, np.ndarray]:
+
+    # Calcula o eixo de tempo e o envelope de amplitude unitária para uma forma de pulso.
+    # Só a amplitude varia entre os pontos de um sweep, então o resultado é cacheado
+    # e devolvido como arrays somente-leitura (são compartilhados entre as chamadas).
+
+    # As duas grades amostram o intervalo fechado [0, duration] (n + 1 pontos): sem o
+    # último ponto, o último dt do pulso ficaria fora da integração e o envelope assimétrico.
+    if sample_rate is None:
+        n_intervals = _DEFAULT_INTERVALS
+    else:
+        n_intervals = _intervals_for_rate(duration, sample_rate)
+    t = _uniform_time_grid(duration, n_intervals)
+    n_points = len(t)
+
+    # Envelope em float32: a precisão já supera a de qualquer DAC
+    if shape == 'gaussian':
+        unit_env = _gaussian_envelope(t, duration, np.empty(n_points, dtype=np.float32))
+    elif shape == 'square':
+        unit_env = np.ones(n_points, dtype=np.float32)
+    else:
+        unit_env = np.zeros(n_points, dtype=np.float32)  # fallback
+
+    t.flags.writeable = False
+    unit_env.flags.writeable = False
+    return t, unit_env
+
+def pulse_to_waveform(op: PulseOperation, sample_rate: Optional[float] = None) -> tuple[np.ndarray, np.ndarray]:
     
     #Converte um objeto PulseOperation em uma forma de onda numérica (envelope).
 
     #Args:
     #    op (PulseOperation): O objeto de pulso da sequência.
-    #    sample_rate (float): A taxa de amostragem para a geração da forma de onda (padrão: 1 GSa/s).
+    #    sample_rate (Optional[float]): A taxa de amostragem para a geração da forma de onda.
+    #        Em qualquer caso a grade inclui t = 0 e t = duration.
+    #        Se None (padrão), usa uma grade que apenas resolve o envelope
+    #        (32 intervalos, 8 por sigma). Isso só vale na rotating frame,
+    #        onde não há portadora rápida; para a forma de onda física do AWG,
+    #        passe a taxa real (ex: 1e9 para 1 GSa/s).
 
     #Returns:
     #    tuple[np.ndarray, np.ndarray]: Uma tupla contendo o array de tempo e o array de amplitude (envelope).
+    #    O array de tempo é compartilhado pelo cache e não deve ser modificado.
     
-    n_points = max(int(op.duration * sample_rate), 2)  # Evita erros com <2 pontos
-    t = np.linspace(0, op.duration, n_points, endpoint=False)
-
-    if op.shape == 'gaussian':
-        sigma = op.duration / 4
-        center = op.duration / 2
-        envelope = op.amplitude * np.exp(-0.5 * ((t - center) / sigma)**2)
-    elif op.shape == 'square':
-        envelope = op.amplitude * np.ones(n_points)
-    else:
-        envelope = np.zeros(n_points)  # fallback
-
-    return t, envelope
\ No newline at end of file
+    t, unit_env = _normalized_envelope(op.duration, op.shape, sample_rate)
+    return t, op.amplitude * unit_env